@@ -20,8 +20,8 @@ if config.config_file_name is not None:
 target_metadata = None
 
 def get_url():
-    """Obtener URL de base de datos desde settings"""
-    return settings.database_url
+    """Obtener URL de base de datos desde alembic.ini o, si está vacía, desde settings"""
+    return config.get_main_option("sqlalchemy.url") or settings.database_url
 
 def run_migrations_offline() -> None:
     """Ejecutar migraciones en modo offline"""
@@ -1,9 +1,10 @@
 from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import uvicorn
 import logging
+import json
 from typing import Dict, Any
 from contextlib import asynccontextmanager
 
@@ -40,6 +41,26 @@ app = FastAPI(
     lifespan=lifespan  # ← Nueva sintaxis
 )
 
+def _dumps_json(content: Dict[str, Any]) -> bytes:
+    """
+    Serializa igual que JSONResponse para respuestas precalculadas
+    """
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+# Respuesta estática del endpoint raíz, serializada una sola vez al arrancar
+_ROOT_BYTES = _dumps_json({
+    "message": f"Bienvenido a {settings.app_name}",
+    "version": "1.0.0",
+    "docs": "/docs" if settings.debug else "Documentación no disponible en producción",
+    "health": "/salud"
+})
+
 @app.get(
     "/salud", 
     summary="Health Check", 
@@ -92,6 +113,30 @@ async def health_check(db: Session = Depends(get_db)):
     return JSONResponse(content=response_data, status_code=status_code)
 
 if settings.debug:
+    from .core.db import get_database_url
+
+    # La información depende solo de settings, se serializa una vez al arrancar
+    _INFO_BYTES = _dumps_json({
+        "application": {
+            "name": settings.app_name,
+            "version": "1.0.0",
+            "debug_mode": settings.debug,
+            "timezone": settings.timezone
+        },
+        "database": {
+            "current_url": database_url,
+            "configured_url": get_database_url(),
+            "type": "SQLite" if database_url.startswith("sqlite") else "PostgreSQL",
+            "is_consistent": database_url == get_database_url()
+        },
+        "environment": {
+            "postgres_server": settings.postgres_server,
+            "postgres_db": settings.postgres_db,
+            "postgres_user": settings.postgres_user,
+            "postgres_port": settings.postgres_port
+        }
+    })
+
     @app.get(
         "/info", 
         summary="Información del Sistema", 
@@ -102,28 +147,7 @@ if settings.debug:
         """
         Información detallada del sistema para desarrollo
         """
-        from .core.db import get_database_url
-        
-        return {
-            "application": {
-                "name": settings.app_name,
-                "version": "1.0.0",
-                "debug_mode": settings.debug,
-                "timezone": settings.timezone
-            },
-            "database": {
-                "current_url": database_url,
-                "configured_url": get_database_url(),
-                "type": "SQLite" if database_url.startswith("sqlite") else "PostgreSQL",
-                "is_consistent": database_url == get_database_url()
-            },
-            "environment": {
-                "postgres_server": settings.postgres_server,
-                "postgres_db": settings.postgres_db,
-                "postgres_user": settings.postgres_user,
-                "postgres_port": settings.postgres_port
-            }
-        }
+        return Response(content=_INFO_BYTES, media_type="application/json")
 
 # Endpoint raíz
 @app.get(
@@ -136,12 +160,7 @@ async def root():
     """
     Endpoint raíz de la aplicación
     """
-    return {
-        "message": f"Bienvenido a {settings.app_name}",
-        "version": "1.0.0",
-        "docs": "/docs" if settings.debug else "Documentación no disponible en producción",
-        "health": "/salud"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 if __name__ == "__main__":
     uvicorn.run(
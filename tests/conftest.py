@@ -1,26 +1,108 @@
 # tests/conftest.py
 import pytest
 import os
-from sqlalchemy import create_engine, text
+import shutil
+import socket
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool, StaticPool
 from app.core.settings import settings
 
 
+# Fixtures para SQLite en memoria
+@pytest.fixture(scope="session")
+def memory_engine():
+    """Engine SQLite en memoria compartido por toda la sesión de tests"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    
+    # pysqlite no emite BEGIN antes de DDL; se delega a SQLAlchemy para que
+    # cerrar la conexión sin commit revierta también los CREATE TABLE
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
+    yield engine
+    engine.dispose()
+
+
+# Fixtures para Alembic
+@pytest.fixture(scope="session")
+def repo_layout():
+    """Nombres de archivos en la raíz y en alembic/, leídos una vez por sesión"""
+    return {
+        "root": {entry.name for entry in os.scandir(".")},
+        "alembic": {entry.name for entry in os.scandir("alembic")},
+    }
+
+
+@pytest.fixture(scope="session")
+def alembic_env_source():
+    """Contenido de alembic/env.py leído una sola vez por sesión"""
+    return Path("alembic/env.py").read_text()
+
+
+@pytest.fixture(scope="session")
+def tmpfs_sqlite_url(tmp_path_factory):
+    """URL de SQLite en archivo temporal (en RAM si TMPDIR apunta a tmpfs)"""
+    db_path = tmp_path_factory.mktemp("db") / "alembic.db"
+    return f"sqlite:///{db_path}"
+
+
+@pytest.fixture(scope="session")
+def alembic_cfg(tmpfs_sqlite_url):
+    """Configuración de Alembic apuntando a BD temporal"""
+    cfg = Config("alembic.ini")
+    cfg.set_main_option("sqlalchemy.url", tmpfs_sqlite_url)
+    return cfg
+
+
+@pytest.fixture(scope="session")
+def _template_db(tmp_path_factory):
+    """BD SQLite con todas las migraciones aplicadas, creada una vez por sesión"""
+    template_path = tmp_path_factory.mktemp("tpl") / "template.db"
+    cfg = Config("alembic.ini")
+    cfg.set_main_option("sqlalchemy.url", f"sqlite:///{template_path}")
+    command.upgrade(cfg, "head")
+    return template_path
+
+
+@pytest.fixture
+def fresh_db(_template_db, tmp_path):
+    """URL de una copia migrada de la plantilla, independiente por test"""
+    db_path = tmp_path / "db.sqlite"
+    shutil.copyfile(_template_db, db_path)
+    return f"sqlite:///{db_path}"
+
+
 # Fixtures para PostgreSQL
 @pytest.fixture(scope="session")
 def postgres_url():
-    """URL de PostgreSQL desde variables de entorno"""
+    """URL de PostgreSQL desde variables de entorno (driver psycopg v3)"""
     if settings.database_url.startswith("postgresql://"):
-        return settings.database_url
-    
-    # Construir desde variables individuales si no está en DATABASE_URL
-    postgres_user = os.getenv("POSTGRES_USER", "postgres")
-    postgres_password = os.getenv("POSTGRES_PASSWORD", "12345678")
-    postgres_server = os.getenv("POSTGRES_SERVER", "localhost")
-    postgres_port = os.getenv("POSTGRES_PORT", "5432")
-    postgres_db = os.getenv("POSTGRES_DB", "pruebas_db")
+        url = settings.database_url
+    else:
+        # Construir desde variables individuales si no está en DATABASE_URL
+        postgres_user = os.getenv("POSTGRES_USER", "postgres")
+        postgres_password = os.getenv("POSTGRES_PASSWORD", "12345678")
+        postgres_server = os.getenv("POSTGRES_SERVER", "localhost")
+        postgres_port = os.getenv("POSTGRES_PORT", "5432")
+        postgres_db = os.getenv("POSTGRES_DB", "pruebas_db")
+        
+        url = f"postgresql://{postgres_user}:{postgres_password}@{postgres_server}:{postgres_port}/{postgres_db}"
     
-    return f"postgresql://{postgres_user}:{postgres_password}@{postgres_server}:{postgres_port}/{postgres_db}"
+    return url.replace("postgresql://", "postgresql+psycopg://", 1)
 
 
 @pytest.fixture(scope="session")
@@ -42,32 +124,14 @@ def postgres_engine(postgres_url, postgres_available):
     if not postgres_available:
         pytest.skip("PostgreSQL no disponible")
     
-    engine = create_engine(postgres_url)
+    # NullPool: cada test abre y cierra su propia conexión, sin estado
+    # compartido entre tests ni bookkeeping del pool. Sin pool_pre_ping
+    # para no acumular conexiones "idle in transaction" si se usa PgBouncer.
+    engine = create_engine(postgres_url, poolclass=NullPool)
     yield engine
     engine.dispose()
 
 
-@pytest.fixture
-def postgres_temp_table(postgres_engine):
-    """Tabla temporal de PostgreSQL con cleanup automático"""
-    table_name = "test_temp_table"
-    
-    with postgres_engine.connect() as conn:
-        # Crear tabla temporal
-        conn.execute(text(f"""
-            CREATE TEMPORARY TABLE {table_name} (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
-    
-    yield postgres_engine, table_name
-    
-    # Cleanup automático (las tablas TEMPORARY se eliminan automáticamente)
-
-
 # Configuración de markers
 def pytest_configure(config):
     """Configuración automática de markers"""
@@ -77,18 +141,39 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "slow: Tests que tardan más de 30 segundos")
 
 
+def _postgres_skip_reason():
+    """Motivo para omitir los tests de PostgreSQL, o None si el servidor responde"""
+    if not settings.database_url.startswith("postgresql://"):
+        return "PostgreSQL no configurado en DATABASE_URL"
+    
+    url = make_url(settings.database_url)
+    try:
+        # Un solo intento de conexión TCP para toda la sesión
+        socket.create_connection((url.host or "localhost", url.port or 5432), timeout=0.2).close()
+    except OSError:
+        return "PostgreSQL no alcanzable"
+    return None
+
+
 def pytest_collection_modifyitems(config, items):
     """Modificar items de test automáticamente"""
+    postgres_skip = None
+    if any("postgres" in item.keywords for item in items):
+        reason = _postgres_skip_reason()
+        if reason:
+            postgres_skip = pytest.mark.skip(reason=reason)
+    
     for item in items:
         # Auto-skip tests de PostgreSQL si no está disponible
-        if "postgres" in item.keywords:
-            if not settings.database_url.startswith("postgresql://"):
-                item.add_marker(pytest.mark.skip(
-                    reason="PostgreSQL no configurado en DATABASE_URL"
-                ))
+        if postgres_skip and "postgres" in item.keywords:
+            item.add_marker(postgres_skip)
         
         # Auto-marcar tests por directorio
         if "integration" in str(item.fspath):
             item.add_marker(pytest.mark.integration)
         elif "unit" in str(item.fspath):
-            item.add_marker(pytest.mark.unit)
\ No newline at end of file
+            item.add_marker(pytest.mark.unit)
+    
+    # Ejecutar los tests lentos al final para ver antes los fallos baratos
+    # (sort estable: se conserva el orden original dentro de cada grupo)
+    items.sort(key=lambda item: "slow" in item.keywords)
\ No newline at end of file
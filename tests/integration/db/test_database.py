@@ -1,11 +1,16 @@
 import pytest
-import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.pool import StaticPool
-from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine.url import make_url
 from app.core.settings import settings
 
+# Sentencias reutilizadas, construidas una sola vez por módulo
+SELECT_1 = text("SELECT 1")
+CREATE_TEST_TABLE = text("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+INSERT_TEST = text("INSERT INTO test_table (name) VALUES (:n)")
+SELECT_TEST_NAME = text("SELECT name FROM test_table")
 
+
+@pytest.mark.xdist_group("db_memory")
 class TestDatabaseConnection:
     """Tests para verificar conexión a base de datos"""
     
@@ -13,88 +18,67 @@ class TestDatabaseConnection:
         """Verificar que DATABASE_URL está configurada"""
         assert settings.database_url is not None
         assert settings.database_url != ""
-        assert "://" in settings.database_url
+        assert make_url(settings.database_url).drivername
     
-    def test_database_connection_memory(self):
+    def test_database_connection_memory(self, memory_engine):
         """Verificar conexión a SQLite en memoria (sin archivos)"""
-        test_db_url = "sqlite:///:memory:"
-        engine = create_engine(
-            test_db_url, 
-            poolclass=StaticPool,
-            connect_args={
-                "check_same_thread": False,
-            }
-        )
-        
-        # Probar conexión
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
+        with memory_engine.connect() as conn:
+            result = conn.execute(SELECT_1)
             assert result.fetchone()[0] == 1
-        
-        # Cerrar engine
-        engine.dispose()
     
-    def test_database_connection_settings(self):
+    def test_database_connection_settings(self, memory_engine):
         """Verificar que se puede crear engine desde settings"""
-        from sqlalchemy import create_engine
-        
-        # Si es archivo SQLite, usar memoria para testing
-        if "sqlite:///" in settings.database_url and settings.database_url != "sqlite:///:memory:":
-            test_url = "sqlite:///:memory:"
-        else:
-            test_url = settings.database_url
+        # Si es SQLite, reutilizar el engine en memoria de la sesión
+        if settings.database_url.startswith("sqlite"):
+            with memory_engine.connect() as conn:
+                result = conn.execute(SELECT_1)
+                assert result.fetchone()[0] == 1
+            return
         
-        # Crear engine usando URL de test
-        engine = create_engine(test_url)
+        # Crear engine usando URL de settings
+        engine = create_engine(settings.database_url)
         
         # Verificar que el engine se crea correctamente
         assert engine is not None
         
-        # Probar conexión básica
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            assert result.fetchone()[0] == 1
-        
-        # Cerrar engine
-        engine.dispose()
+        try:
+            # Probar conexión básica
+            with engine.connect() as conn:
+                result = conn.execute(SELECT_1)
+                assert result.fetchone()[0] == 1
+        finally:
+            # Cerrar engine propio (el compartido lo cierra el fixture)
+            engine.dispose()
 
 
 class TestMigrationsConfiguration:
     """Tests para verificar configuración de Alembic"""
     
-    def test_alembic_config_exists(self):
+    def test_alembic_config_exists(self, repo_layout):
         """Verificar que alembic.ini existe"""
-        assert os.path.exists("alembic.ini")
+        assert "alembic.ini" in repo_layout["root"]
     
-    def test_alembic_directory_exists(self):
+    def test_alembic_directory_exists(self, repo_layout):
         """Verificar que directorio alembic existe"""
-        assert os.path.exists("alembic")
-        assert os.path.exists("alembic/env.py")
-        assert os.path.exists("alembic/versions")
+        assert "alembic" in repo_layout["root"]
+        assert "env.py" in repo_layout["alembic"]
+        assert "versions" in repo_layout["alembic"]
     
-    def test_alembic_env_imports_settings(self):
+    def test_alembic_env_imports_settings(self, alembic_env_source):
         """Verificar que env.py importa settings correctamente"""
-        with open("alembic/env.py", 'r') as f:
-            content = f.read()
-            assert "from app.core.settings import settings" in content
-            assert "def get_url():" in content
-            assert "settings.database_url" in content
+        assert "from app.core.settings import settings" in alembic_env_source
+        assert "def get_url():" in alembic_env_source
+        assert "settings.database_url" in alembic_env_source
     
-    def test_alembic_can_load_config(self):
+    def test_alembic_can_load_config(self, alembic_cfg):
         """Verificar que Alembic puede cargar la configuración"""
-        try:
-            # Intentar cargar configuración de Alembic
-            alembic_cfg = Config("alembic.ini")
-            assert alembic_cfg is not None
-        except Exception as e:
-            pytest.fail(f"No se pudo cargar alembic.ini: {e}")
+        assert alembic_cfg is not None
+        assert alembic_cfg.get_main_option("script_location") is not None
     
-    def test_alembic_env_syntax_valid(self):
+    def test_alembic_env_syntax_valid(self, alembic_env_source):
         """Verificar que env.py tiene sintaxis válida"""
         try:
-            with open("alembic/env.py", 'r') as f:
-                content = f.read()
-                compile(content, "alembic/env.py", "exec")
+            compile(alembic_env_source, "alembic/env.py", "exec")
         except SyntaxError as e:
             pytest.fail(f"Error de sintaxis en alembic/env.py: {e}")
 
@@ -102,162 +86,82 @@ class TestMigrationsConfiguration:
 class TestMigrationsBasic:
     """Tests básicos de migraciones sin ejecución completa"""
     
-    def test_alembic_current_with_memory_db(self):
-        """Verificar 'alembic current' con BD en memoria"""
-        from alembic.config import Config
+    def test_alembic_current_with_memory_db(self, capsys, alembic_cfg):
+        """Verificar 'alembic current' con BD temporal"""
         from alembic import command
-        from io import StringIO
-        import sys
         
-        # Capturar output
-        captured_output = StringIO()
+        # Ejecutar comando current (no debería fallar)
+        command.current(alembic_cfg)
         
-        try:
-            # Configurar Alembic para usar BD en memoria
-            alembic_cfg = Config("alembic.ini")
-            alembic_cfg.set_main_option("sqlalchemy.url", "sqlite:///:memory:")
-            
-            # Redirigir stdout para capturar output
-            old_stdout = sys.stdout
-            sys.stdout = captured_output
-            
-            # Ejecutar comando current
-            command.current(alembic_cfg)
-            
-            # Restaurar stdout
-            sys.stdout = old_stdout
-            
-            # El comando no debería fallar
-            output = captured_output.getvalue()
-            
-        except Exception as e:
-            sys.stdout = old_stdout
-            pytest.fail(f"Error en 'alembic current': {e}")
+        captured = capsys.readouterr()
     
-    def test_alembic_history_command(self):
+    def test_alembic_history_command(self, capsys, alembic_cfg):
         """Verificar que 'alembic history' funciona"""
-        from alembic.config import Config
         from alembic import command
-        from io import StringIO
-        import sys
         
-        captured_output = StringIO()
+        command.history(alembic_cfg)
+        
+        captured = capsys.readouterr()
+    
+    def test_fresh_db_is_migrated(self, fresh_db):
+        """Verificar que la copia de la plantilla ya tiene las migraciones aplicadas"""
+        engine = create_engine(fresh_db)
         
         try:
-            alembic_cfg = Config("alembic.ini")
-            alembic_cfg.set_main_option("sqlalchemy.url", "sqlite:///:memory:")
-            
-            old_stdout = sys.stdout
-            sys.stdout = captured_output
-            
-            command.history(alembic_cfg)
-            
-            sys.stdout = old_stdout
-            
-        except Exception as e:
-            sys.stdout = old_stdout
-            pytest.fail(f"Error en 'alembic history': {e}")
+            assert "alembic_version" in inspect(engine).get_table_names()
+        finally:
+            engine.dispose()
 
 
+@pytest.mark.xdist_group("db_memory")
 class TestDatabaseIntegrationMemory:
     """Tests de integración usando BD en memoria"""
     
-    def test_engine_creation_and_connection(self):
+    def test_engine_creation_and_connection(self, memory_engine):
         """Test de creación de engine y conexión básica"""
-        test_url = "sqlite:///:memory:"
-        
-        try:
-            # Crear engine
-            engine = create_engine(
-                test_url,
-                poolclass=StaticPool,
-                connect_args={"check_same_thread": False}
-            )
+        # Los cambios se revierten al cerrar la conexión sin commit
+        with memory_engine.connect() as conn:
+            result = conn.execute(SELECT_1)
+            assert result.fetchone()[0] == 1
             
-            # Verificar conexión
-            with engine.connect() as conn:
-                result = conn.execute(text("SELECT 1"))
-                assert result.fetchone()[0] == 1
-                
-                # Crear tabla simple para probar
-                conn.execute(text("""
-                    CREATE TABLE test_table (
-                        id INTEGER PRIMARY KEY,
-                        name TEXT
-                    )
-                """))
-                
-                # Insertar datos
-                conn.execute(text("INSERT INTO test_table (name) VALUES ('test')"))
-                
-                # Verificar datos
-                result = conn.execute(text("SELECT name FROM test_table"))
-                assert result.fetchone()[0] == 'test'
-                
-                conn.commit()
+            # Crear tabla simple para probar
+            conn.execute(CREATE_TEST_TABLE)
             
-            # Cerrar engine
-            engine.dispose()
+            # Insertar datos
+            conn.execute(INSERT_TEST, {"n": "test"})
             
-        except Exception as e:
-            pytest.fail(f"Error en test de integración: {e}")
+            # Verificar datos
+            result = conn.execute(SELECT_TEST_NAME)
+            assert result.fetchone()[0] == 'test'
     
-    def test_multiple_database_urls(self):
-        """Verificar que diferentes tipos de URL funcionan"""
-        test_urls = [
-            "sqlite:///:memory:",
-            "sqlite:///:memory:",  # Doble test para asegurar limpieza
-        ]
+    @pytest.mark.parametrize("url", ["sqlite:///:memory:"])
+    def test_memory_url(self, url, memory_engine):
+        """Verificar que la URL en memoria funciona"""
+        assert str(memory_engine.url) == url
         
-        for i, url in enumerate(test_urls):
-            try:
-                engine = create_engine(
-                    url,
-                    poolclass=StaticPool,
-                    connect_args={"check_same_thread": False}
-                )
-                
-                with engine.connect() as conn:
-                    result = conn.execute(text("SELECT 1"))
-                    assert result.fetchone()[0] == 1
-                
-                engine.dispose()
-                
-            except Exception as e:
-                pytest.fail(f"Error con URL {i+1}: {e}")
+        with memory_engine.connect() as conn:
+            result = conn.execute(SELECT_1)
+            assert result.fetchone()[0] == 1
 
 
 class TestSettingsConfiguration:
     """Tests específicos para configuración de settings"""
     
-    def test_settings_database_url_format(self):
-        """Verificar formato de DATABASE_URL en settings"""
-        db_url = settings.database_url
-        
+    def test_settings_sanity(self):
+        """Verificar formato de DATABASE_URL y que .env se carga correctamente"""
         # Verificar que es una URL válida
-        assert "://" in db_url
+        url = make_url(settings.database_url)
         
         # Verificar que es SQLite o PostgreSQL
-        assert db_url.startswith(("sqlite://", "postgresql://"))
-    
-    def test_settings_import_works(self):
-        """Verificar que settings se puede importar sin errores"""
-        try:
-            from app.core.settings import settings
-            
-            # Verificar que tiene los atributos necesarios
-            assert hasattr(settings, 'database_url')
-            assert hasattr(settings, 'app_name')
-            assert hasattr(settings, 'debug')
-            
-        except Exception as e:
-            pytest.fail(f"Error importando settings: {e}")
-    
-    def test_env_file_loading(self):
-        """Verificar que .env se carga correctamente"""
-        # Este test verifica indirectamente que .env funciona
-        # porque settings debería tener valores no vacíos
+        assert url.get_backend_name() in ("sqlite", "postgresql")
         
+        # Verificar que tiene los atributos necesarios
+        assert hasattr(settings, 'database_url')
+        assert hasattr(settings, 'app_name')
+        assert hasattr(settings, 'debug')
+        
+        # Verifica indirectamente que .env funciona,
+        # porque settings debería tener valores no vacíos
         assert settings.app_name is not None
         assert settings.app_name != ""
         
@@ -2,9 +2,18 @@
 import pytest
 import os
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.exc import OperationalError
 from app.core.settings import settings
 
+# Sentencias reutilizadas, construidas una sola vez por módulo
+SELECT_1 = text("SELECT 1")
+COUNT_TEST_CRUD = text("SELECT COUNT(*) FROM test_crud")
+INSERT_TEST_CRUD = text("INSERT INTO test_crud (name) VALUES (:name)")
+
+# Todos los tests que comparten postgres_engine van al mismo worker de xdist
+pytestmark = pytest.mark.xdist_group("db_postgres")
+
 
 class TestPostgreSQLConnection:
     """Tests para verificar conexión a PostgreSQL"""
@@ -12,25 +21,25 @@ class TestPostgreSQLConnection:
     @pytest.mark.postgres
     def test_postgres_url_format(self, postgres_url):
         """Verificar formato de URL de PostgreSQL"""
-        assert postgres_url.startswith("postgresql://")
-        assert "@" in postgres_url
-        assert ":" in postgres_url
-        
-        # Verificar componentes básicos
-        parts = postgres_url.replace("postgresql://", "").split("@")
-        assert len(parts) == 2
+        url = make_url(postgres_url)
         
-        user_pass = parts[0]
-        server_db = parts[1]
-        
-        assert ":" in user_pass  # usuario:password
-        assert "/" in server_db  # servidor:puerto/base_datos
+        assert url.drivername == "postgresql+psycopg"
+        assert url.username  # usuario
+        assert url.password  # password
+        assert url.host  # servidor
+        assert url.port  # puerto
+        assert url.database  # base_datos
+    
+    @pytest.mark.postgres
+    def test_postgres_driver_psycopg(self, postgres_engine):
+        """Verificar que se usa el driver psycopg (v3)"""
+        assert postgres_engine.dialect.driver == "psycopg"
     
     @pytest.mark.postgres
     def test_postgres_connection_basic(self, postgres_engine):
         """Verificar conexión básica a PostgreSQL"""
         with postgres_engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
+            result = conn.execute(SELECT_1)
             assert result.fetchone()[0] == 1
     
     @pytest.mark.postgres
@@ -53,72 +62,45 @@ class TestPostgreSQLOperations:
     """Tests para operaciones CRUD en PostgreSQL"""
     
     @pytest.mark.postgres
-    def test_create_table(self, postgres_engine):
-        """Test crear tabla temporal"""
+    def test_crud_lifecycle(self, postgres_engine):
+        """Test CREATE → INSERT → UPDATE → DELETE sobre una sola conexión"""
+        # Sin commit: al cerrar la conexión se revierte todo y la tabla
+        # temporal desaparece con la sesión
         with postgres_engine.connect() as conn:
+            # Crear tabla temporal
             conn.execute(text("""
-                CREATE TEMPORARY TABLE test_create (
+                CREATE TEMPORARY TABLE test_crud (
                     id SERIAL PRIMARY KEY,
-                    name VARCHAR(100)
+                    name VARCHAR(100),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """))
             
-            # Verificar que existe
             result = conn.execute(text("""
                 SELECT COUNT(*) FROM information_schema.tables 
-                WHERE table_name = 'test_create'
+                WHERE table_name = 'test_crud'
             """))
             assert result.fetchone()[0] >= 1
-    
-    @pytest.mark.postgres
-    def test_insert_data(self, postgres_temp_table):
-        """Test insertar datos"""
-        engine, table_name = postgres_temp_table
-        
-        with engine.connect() as conn:
-            conn.execute(text(f"""
-                INSERT INTO {table_name} (name) VALUES 
-                ('test1'), ('test2'), ('test3')
-            """))
             
-            result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
+            # Insertar datos
+            conn.execute(INSERT_TEST_CRUD, [{"name": n} for n in ("test1", "test2", "test3")])
+            
+            result = conn.execute(COUNT_TEST_CRUD)
             assert result.fetchone()[0] == 3
-    
-    @pytest.mark.postgres
-    def test_update_data(self, postgres_temp_table):
-        """Test actualizar datos"""
-        engine, table_name = postgres_temp_table
-        
-        with engine.connect() as conn:
-            # Insertar dato inicial
-            conn.execute(text(f"INSERT INTO {table_name} (name) VALUES ('original')"))
             
             # Actualizar
-            conn.execute(text(f"UPDATE {table_name} SET name = 'updated' WHERE name = 'original'"))
+            conn.execute(text("UPDATE test_crud SET name = 'keep' WHERE name = 'test1'"))
             
-            # Verificar
-            result = conn.execute(text(f"SELECT name FROM {table_name}"))
-            assert result.fetchone()[0] == 'updated'
-    
-    @pytest.mark.postgres
-    def test_delete_data(self, postgres_temp_table):
-        """Test eliminar datos"""
-        engine, table_name = postgres_temp_table
-        
-        with engine.connect() as conn:
-            # Insertar datos
-            conn.execute(text(f"""
-                INSERT INTO {table_name} (name) VALUES ('keep'), ('delete')
-            """))
+            result = conn.execute(text("SELECT name FROM test_crud WHERE name = 'keep'"))
+            assert result.fetchone()[0] == 'keep'
             
-            # Eliminar uno
-            conn.execute(text(f"DELETE FROM {table_name} WHERE name = 'delete'"))
+            # Eliminar
+            conn.execute(text("DELETE FROM test_crud WHERE name <> 'keep'"))
             
-            # Verificar
-            result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
+            result = conn.execute(COUNT_TEST_CRUD)
             assert result.fetchone()[0] == 1
             
-            result = conn.execute(text(f"SELECT name FROM {table_name}"))
+            result = conn.execute(text("SELECT name FROM test_crud"))
             assert result.fetchone()[0] == 'keep'
 
 
@@ -126,28 +108,28 @@ class TestPostgreSQLFeatures:
     """Tests para características específicas de PostgreSQL"""
     
     @pytest.mark.postgres
-    def test_generate_series(self, postgres_engine):
-        """Test función GENERATE_SERIES de PostgreSQL"""
+    def test_postgres_features(self, postgres_engine):
+        """Test GENERATE_SERIES, ARRAY, JSON y funciones SQL estándar en una sola consulta"""
         with postgres_engine.connect() as conn:
-            result = conn.execute(text("SELECT generate_series(1, 3)"))
-            numbers = [row[0] for row in result.fetchall()]
-            assert numbers == [1, 2, 3]
-    
-    @pytest.mark.postgres
-    def test_array_type(self, postgres_engine):
-        """Test tipo ARRAY de PostgreSQL"""
-        with postgres_engine.connect() as conn:
-            result = conn.execute(text("SELECT ARRAY[1, 2, 3]"))
-            array_result = result.fetchone()[0]
-            assert array_result == [1, 2, 3]
-    
-    @pytest.mark.postgres
-    def test_json_type(self, postgres_engine):
-        """Test tipo JSON de PostgreSQL"""
-        with postgres_engine.connect() as conn:
-            result = conn.execute(text("SELECT '{\"key\": \"value\"}'::json"))
-            json_result = result.fetchone()[0]
-            assert json_result == {"key": "value"}
+            result = conn.execute(text("""
+                SELECT
+                    ARRAY(SELECT generate_series(1, 3)),
+                    ARRAY[1, 2, 3],
+                    '{"key": "value"}'::json,
+                    CURRENT_TIMESTAMP,
+                    UPPER('test'),
+                    LENGTH('test')
+            """))
+            series, array_result, json_result, timestamp, upper, length = result.fetchone()
+        
+        assert series == [1, 2, 3]
+        assert array_result == [1, 2, 3]
+        assert json_result == {"key": "value"}
+        
+        # Funciones estándar SQL que deberían funcionar en ambos
+        assert timestamp is not None
+        assert upper == 'TEST'
+        assert length == 4
 
 
 class TestPostgreSQLConfiguration:
@@ -190,7 +172,7 @@ class TestPostgreSQLConfiguration:
             connections = []
             for i in range(3):
                 conn = engine.connect()
-                result = conn.execute(text("SELECT 1"))
+                result = conn.execute(SELECT_1)
                 assert result.fetchone()[0] == 1
                 connections.append(conn)
             
@@ -206,33 +188,14 @@ class TestDatabaseComparison:
     """Tests comparativos entre diferentes bases de datos"""
     
     @pytest.mark.integration
-    def test_sqlite_vs_postgres_basic_operations(self, postgres_engine):
+    def test_sqlite_vs_postgres_basic_operations(self, memory_engine, postgres_engine):
         """Comparar operaciones básicas entre SQLite y PostgreSQL"""
         # Test SQLite
-        sqlite_engine = create_engine("sqlite:///:memory:")
-        
-        try:
-            with sqlite_engine.connect() as conn:
-                result = conn.execute(text("SELECT 1"))
-                assert result.fetchone()[0] == 1
-        finally:
-            sqlite_engine.dispose()
+        with memory_engine.connect() as conn:
+            result = conn.execute(SELECT_1)
+            assert result.fetchone()[0] == 1
         
         # Test PostgreSQL  
         with postgres_engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
+            result = conn.execute(SELECT_1)
             assert result.fetchone()[0] == 1
-    
-    @pytest.mark.postgres
-    def test_sql_dialect_compatibility(self, postgres_engine):
-        """Test compatibilidad de dialectos SQL"""
-        with postgres_engine.connect() as conn:
-            # Funciones estándar SQL que deberían funcionar en ambos
-            result = conn.execute(text("SELECT CURRENT_TIMESTAMP"))
-            assert result.fetchone()[0] is not None
-            
-            result = conn.execute(text("SELECT UPPER('test')"))
-            assert result.fetchone()[0] == 'TEST'
-            
-            result = conn.execute(text("SELECT LENGTH('test')"))
-            assert result.fetchone()[0] == 4
\ No newline at end of file